@@ -480,6 +480,16 @@ def get_latest_user_message(messages):
 from langgraph.graph import MessagesState
 from langchain_deepseek import ChatDeepSeek
 
+
+class AgentState(MessagesState):
+    # Plain (non-reducer) channels so endpoints read the outcome without
+    # scanning the message history. final_answer is overwritten by whichever
+    # node answers; last_tool by the tools node on every tool result, so it
+    # keeps tracking the most recent tool in the thread.
+    final_answer: str | None
+    last_tool: tuple[str, str] | None   # (tool_name, tool_type)
+
+
 response_model =  ChatDeepSeek(
     model="nvidia/nemotron-3-nano-30b-a3b:free",
     api_key=os.getenv("OPENROUTER_API_KEY"),
@@ -490,7 +500,7 @@ response_model =  ChatDeepSeek(
 
 from langchain_core.messages import SystemMessage
 
-def generate_query_or_respond(state: MessagesState):
+def generate_query_or_respond(state: AgentState):
     """
     Decide whether to call a tool or answer directly.
     Prefer CCC internal RAG tools whenever possible.
@@ -527,6 +537,13 @@ def generate_query_or_respond(state: MessagesState):
         .invoke([system_prompt] + messages)
     )
 
+    # ✅ Direct answer (no tool call) ends the turn
+    if not response.tool_calls:
+        return {
+            "messages": [response],
+            "final_answer": response.content,
+        }
+
     return {"messages": [response]}
 
 
@@ -563,7 +580,7 @@ grader_model = ChatDeepSeek(
 
 
 def grade_documents(
-    state: MessagesState,
+    state: AgentState,
 ) -> Literal["generate_answer", "rewrite_question"]:
 
     messages = state["messages"]
@@ -603,7 +620,7 @@ REWRITE_PROMPT = (
 )
 
 
-def rewrite_question(state: MessagesState):
+def rewrite_question(state: AgentState):
     """Rewrite the original user question."""
     messages = state["messages"]
     rewrite_count = state.get("rewrite_count", 0)
@@ -656,7 +673,7 @@ RAG_TOOL_NAMES = [
 ]
 
 
-def generate_answer(state: MessagesState):
+def generate_answer(state: AgentState):
     """Generate a final answer with tool-type awareness (memory-safe)."""
 
     messages = state["messages"]
@@ -694,7 +711,7 @@ def generate_answer(state: MessagesState):
         "tool_name": tool_name,
     }
 
-    return {"messages": [response]}
+    return {"messages": [response], "final_answer": response.content}
 
 
 
@@ -719,6 +736,9 @@ grader_model = ChatDeepSeek(
     extra_body={"reasoning": {"enabled": True}},
 )
 
+# Bind the schema once; each call is then a plain invoke
+suggestion_model = grader_model.with_structured_output(SuggestPrompt)
+
 SUGGESTION_PROMPT = """
 You are an assistant that generates follow-up query suggestions.
 
@@ -743,9 +763,7 @@ def next_suggestions(state):
     final_answer = last_message.content
     prompt = SUGGESTION_PROMPT.format(final_answer=final_answer)
 
-    response = grader_model.with_structured_output(
-        SuggestPrompt
-    ).invoke(prompt)
+    response = suggestion_model.invoke(prompt)
 
     # ✅ Convert structured output → text
     suggestions_text = "\n".join(
@@ -762,17 +780,17 @@ def next_suggestions(state):
 
 
 from langgraph.graph import StateGraph, START, END
-from langgraph.prebuilt import ToolNode
 from langgraph.prebuilt import tools_condition
 from uuid import uuid4
 from langgraph.checkpoint.memory import InMemorySaver
 from langchain_core.runnables import RunnableConfig
+from src.utils.tool_tracking import tracking_tool_node
 
-workflow = StateGraph(MessagesState)
+workflow = StateGraph(AgentState)
 
 # Define the nodes we will cycle between
 workflow.add_node("generate_query_or_respond", generate_query_or_respond)
-workflow.add_node("all_tools", ToolNode(tools))
+workflow.add_node("all_tools", tracking_tool_node(tools))
 workflow.add_node("rewrite_question", rewrite_question)
 workflow.add_node("generate_answer", generate_answer)
 # workflow.add_node("next_suggestions", next_suggestions)
@@ -805,6 +823,9 @@ workflow.add_edge("generate_answer", END)
 # workflow.add_edge("next_suggestions", END)
 workflow.add_edge("rewrite_question", "generate_query_or_respond")
 
+# Nodes whose LLM output is the user-facing answer (streamed token by token)
+ANSWER_NODES = {"generate_query_or_respond", "generate_answer"}
+
 checkpointer = InMemorySaver()
 
 # Compile
@@ -2,6 +2,8 @@
 
 import sys
 import os
+import time
+import asyncio
 
 # -----------------------------
 # Fix Python path for Streamlit
@@ -15,11 +17,12 @@ if PROJECT_ROOT not in sys.path:
 # -----------------------------
 import streamlit as st
 from uuid import uuid4
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
 
 # 🔹 Import compiled LangGraph
-from src.app import graph
+from src.app import ANSWER_NODES, graph
+from src.utils.graph_events import stream_graph_events
 
 # -----------------------------
 # Page Config
@@ -72,14 +75,83 @@ with st.sidebar:
 # -----------------------------
 # Display Chat History
 # -----------------------------
-for msg in st.session_state.messages:
-    if msg["role"] == "user":
-        with st.chat_message("user"):
-            st.markdown(msg["content"])
-    else:
-        with st.chat_message("assistant"):
+def render_history(messages: list[dict]) -> None:
+    for msg in messages:
+        role = "user" if msg["role"] == "user" else "assistant"
+        with st.chat_message(role):
             st.markdown(msg["content"])
 
+
+render_history(st.session_state.messages)
+
+# -----------------------------
+# Message Handlers
+# -----------------------------
+# Each handler renders a non-answer message as an execution trace entry.
+def handle_tool_message(msg: ToolMessage) -> str:
+    return (
+        f"🛠️ **Tool Used:** `{msg.name}`\n\n"
+        f"📤 **Tool Output:**\n```\n{msg.content}\n```"
+    )
+
+
+def handle_human_message(msg: HumanMessage) -> str:
+    return f"✏️ **Internal User Message:** {msg.content}"
+
+
+MESSAGE_HANDLERS = {
+    ToolMessage: handle_tool_message,      # 🛠️ Tool messages
+    HumanMessage: handle_human_message,    # ✏️ Internal rewritten user message
+}
+
+# Re-render the placeholders at most every FLUSH_INTERVAL seconds
+FLUSH_INTERVAL = 0.05
+
+
+# -----------------------------
+# LangGraph Streaming
+# -----------------------------
+async def stream_answer(user_input: str, answer_placeholder, debug_placeholder) -> str:
+    final_answer = ""
+    answer_id = None
+    debug_log = ""   # running trace; entries are appended, never re-joined
+    last_flush = 0.0
+
+    def flush() -> None:
+        answer_placeholder.markdown(final_answer)
+        debug_placeholder.markdown(debug_log)
+
+    async for ev in stream_graph_events(
+        graph,
+        {"messages": [HumanMessage(content=user_input)], "rewrite_count": 0},
+        config,
+        ANSWER_NODES,
+    ):
+        if ev["type"] == "node":
+            debug_log += f"\n\n🔹 **Node:** `{ev['node']}`"
+
+        # 🤖 AI tokens (LIVE): new message → fresh buffer, else append
+        elif ev["type"] == "token":
+            if ev["id"] is not None and ev["id"] != answer_id:
+                answer_id, final_answer = ev["id"], ""
+            final_answer += ev["text"]
+
+        else:
+            handler = MESSAGE_HANDLERS.get(type(ev["message"]))
+            if handler:
+                debug_log += "\n\n" + handler(ev["message"])
+
+        # 🔄 Live update (throttled)
+        now = time.monotonic()
+        if now - last_flush > FLUSH_INTERVAL:
+            flush()
+            last_flush = now
+
+    # Always show the final frame
+    flush()
+    return final_answer
+
+
 # -----------------------------
 # User Input
 # -----------------------------
@@ -103,44 +175,12 @@ if user_input:
     with st.expander("🧠 Execution Trace (Nodes & Tools)", expanded=False):
         debug_placeholder = st.empty()
 
-    final_answer = ""
-    debug_logs: list[str] = []
-
     # -------------------------
     # LangGraph Streaming
     # -------------------------
-    for chunk in graph.stream(
-        {"messages": [HumanMessage(content=user_input)],"rewrite_count": 0},
-        config=config,
-    ):
-        for node_name, update in chunk.items():
-
-            debug_logs.append(f"🔹 **Node:** `{node_name}`")
-
-            for msg in update["messages"]:
-
-                # 🛠️ Tool messages
-                if msg.__class__.__name__ == "ToolMessage":
-                    debug_logs.append(
-                        f"🛠️ **Tool Used:** `{msg.name}`"
-                    )
-                    debug_logs.append(
-                        f"📤 **Tool Output:**\n```\n{msg.content}\n```"
-                    )
-
-                # 🤖 AI streaming (LIVE)
-                elif isinstance(msg, AIMessage):
-                    final_answer = msg.content
-                    answer_placeholder.markdown(final_answer)
-
-                # ✏️ Internal rewritten user message
-                elif isinstance(msg, HumanMessage):
-                    debug_logs.append(
-                        f"✏️ **Internal User Message:** {msg.content}"
-                    )
-
-            # 🔄 Live debug update
-            debug_placeholder.markdown("\n\n".join(debug_logs))
+    final_answer = asyncio.run(
+        stream_answer(user_input, answer_placeholder, debug_placeholder)
+    )
 
     # -------------------------
     # Save FINAL answer only
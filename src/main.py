@@ -1,12 +1,20 @@
-from fastapi import FastAPI, WebSocket
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, Response, WebSocket
+from fastapi.middleware.gzip import GZipMiddleware
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 from pydantic import BaseModel, Field
 import uvicorn
 import uuid
-import json
-import time
+import orjson
 
-from ccc_chatbot_custom import graph
+from langchain_core.messages import AIMessage
+
+from src.app import ANSWER_NODES, graph, suggestion_model, workflow
+from src.utils.bounded_stream import bounded_stream
+from src.utils.graph_events import stream_graph_events
+from src.utils.graph_lifespan import graph_lifespan
+from src.utils.message_delta import merge_deltas
+from src.utils.orjson_response import ORJSONResponse
+from src.utils.thread_config import thread_config
 
 # -----------------------------
 # App
@@ -15,8 +23,13 @@ app = FastAPI(
     title="CCC-ChatBot-Server",
     version="1.0.0",
     description="Fast API-style server for CCC chatbot",
+    default_response_class=ORJSONResponse,
+    lifespan=graph_lifespan(workflow, graph),
 )
 
+# Large JSON bodies only; Starlette skips text/event-stream, so SSE is untouched
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # -----------------------------
 # Schemas
 # -----------------------------
@@ -34,19 +47,18 @@ class QueryResponse(BaseModel):
 # -----------------------------
 # Core Graph Runner (NON-STREAM)
 # -----------------------------
-def run_graph(query: str, thread_id: str) -> tuple[str, list[str]]:
-    config = {"configurable": {"thread_id": thread_id}}
+async def run_graph(query: str, thread_id: str) -> tuple[str, list[str]]:
+    config = thread_config(thread_id)
 
     final_answer = ""
     steps_log: list[str] = []
+    step = 0
 
-    for step, chunk in enumerate(
-        graph.stream(
-            {"messages": [{"role": "user", "content": query}]},
-            config=config,
-        ),
-        start=1,
+    async for chunk in app.state.graph.astream(
+        {"messages": [{"role": "user", "content": query}]},
+        config=config,
     ):
+        step += 1
         for node, update in chunk.items():
             msg = update["messages"][-1]
             content = msg.content if hasattr(msg, "content") else str(msg)
@@ -62,34 +74,53 @@ def run_graph(query: str, thread_id: str) -> tuple[str, list[str]]:
 # -----------------------------
 # SSE STREAMING
 # -----------------------------
-def sse_graph_stream(query: str, thread_id: str):
-    config = {"configurable": {"thread_id": thread_id}}
+def _sse(evt: dict) -> ServerSentEvent:
+    return ServerSentEvent(data=orjson.dumps(evt).decode())
+
+
+def _droppable(evt: dict) -> bool:
+    # The client needs init (thread id), answer text and done no matter how
+    # slow it reads; only step/message progress updates may be dropped
+    return evt["event"] not in ("init", "delta", "done")
+
+
+async def sse_graph_stream(query: str, thread_id: str):
+    config = thread_config(thread_id)
 
     # Send thread id first
-    yield f"data: {json.dumps({'event': 'init', 'thread_id': thread_id})}\n\n"
+    yield {"event": "init", "thread_id": thread_id}
 
     try:
-        for step, chunk in enumerate(
-            graph.stream(
-                {"messages": [{"role": "user", "content": query}]},
-                config=config,
-            ),
-            start=1,
+        step = 0
+        async for ev in stream_graph_events(
+            app.state.graph,
+            {"messages": [{"role": "user", "content": query}]},
+            config,
+            ANSWER_NODES,
         ):
-            for node, update in chunk.items():
-                msg = update["messages"][-1]
-                content = msg.content if hasattr(msg, "content") else str(msg)
-
-                yield f"data: {json.dumps({
-                    'event': 'step',
-                    'step': step,
-                    'node': node,
-                    'content': content
-                })}\n\n"
+            if ev["type"] == "node":
+                step += 1
+                yield {"event": "step", "step": step, "node": ev["node"]}
 
-                time.sleep(0.03)
+            elif ev["type"] == "token":
+                yield {
+                    "event": "delta",
+                    "step": step,
+                    "node": ev["node"],
+                    "id": ev["id"],
+                    "text": ev["text"],
+                }
+
+            else:
+                msg = ev["message"]
+                yield {
+                    "event": "message",
+                    "step": step,
+                    "node": ev["node"],
+                    "content": msg.content,
+                }
 
-        yield f"data: {json.dumps({'event': 'done'})}\n\n"
+        yield {"event": "done"}
 
     except GeneratorExit:
         return
@@ -98,38 +129,44 @@ def sse_graph_stream(query: str, thread_id: str):
 # -----------------------------
 # Endpoints
 # -----------------------------
+# Static bodies are serialized once at import, not on every request
+ROOT_BODY = orjson.dumps({"message": "Welcome to the CCC Chatbot Server"})
+HEALTH_BODY = orjson.dumps({"status": "healthy", "code": 200})
+
+
 @app.get("/")
-def root():
-    return {"message": "Welcome to the CCC Chatbot Server"}
+async def root():
+    return Response(ROOT_BODY, media_type="application/json")
 
 @app.get("/health")
-def health():
-    return {"status": "healthy", "code": 200}
+async def health():
+    return Response(HEALTH_BODY, media_type="application/json")
 
 # -------- JSON (final answer + steps)
-@app.post("/query", response_model=QueryResponse)
-def query(req: QueryRequest):
+@app.post("/query", responses={200: {"model": QueryResponse}})
+async def query(req: QueryRequest):
     thread_id = req.thread_id or str(uuid.uuid4())
-    answer, steps = run_graph(req.query, thread_id)
+    answer, steps = await run_graph(req.query, thread_id)
 
-    return {
+    return ORJSONResponse({
         "answer": answer,
         "steps": steps,
         "thread_id": thread_id,
-    }
+    })
 
 # -------- SSE STREAM
 @app.post("/query/stream")
-def query_stream(req: QueryRequest):
+async def query_stream(req: QueryRequest):
     thread_id = req.thread_id or str(uuid.uuid4())
 
-    return StreamingResponse(
-        sse_graph_stream(req.query, thread_id),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-        },
+    return EventSourceResponse(
+        bounded_stream(
+            sse_graph_stream(req.query, thread_id),
+            encode=_sse,
+            merge=merge_deltas,
+            droppable=_droppable,
+        ),
+        ping=15,
     )
 
 # -------- WEBSOCKET STREAM
@@ -147,15 +184,14 @@ async def query_ws(websocket: WebSocket):
             "thread_id": thread_id,
         })
 
-        config = {"configurable": {"thread_id": thread_id}}
+        config = thread_config(thread_id)
+        step = 0
 
-        for step, chunk in enumerate(
-            graph.stream(
-                {"messages": [{"role": "user", "content": query}]},
-                config=config,
-            ),
-            start=1,
+        async for chunk in app.state.graph.astream(
+            {"messages": [{"role": "user", "content": query}]},
+            config=config,
         ):
+            step += 1
             for node, update in chunk.items():
                 msg = update["messages"][-1]
                 content = msg.content if hasattr(msg, "content") else str(msg)
@@ -224,9 +260,7 @@ def next_suggestions(state):
     final_answer = last_message.content
     prompt = SUGGESTION_PROMPT.format(final_answer=final_answer)
 
-    response = grader_model.with_structured_output(
-        SuggestPrompt
-    ).invoke(prompt)
+    response = suggestion_model.invoke(prompt)
 
     # ✅ Convert structured output → text
     suggestions_text = "\n".join(
@@ -1,19 +1,32 @@
 # uvicorn src.server:app --reload
+# uvicorn src.server:app --loop uvloop --http httptools --workers $(nproc) --no-access-log   (production)
+#   --workers > 1 only with POSTGRES_URI set; the default InMemorySaver keeps memory per worker
 
+import gzip
 import uuid
-from typing import Optional, Generator
+from collections import OrderedDict
+from typing import Any, Optional, AsyncGenerator
 
-from fastapi import FastAPI
+import orjson
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 from pydantic import BaseModel
 
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langchain_core.messages import HumanMessage, ToolMessage
 from langgraph.graph import MessagesState
 
 
 # 🔹 IMPORT YOUR GRAPH
-from src.app import graph   # <-- adjust import if needed
+from src.app import ANSWER_NODES, graph, workflow   # <-- adjust import if needed
+from src.utils.bounded_stream import bounded_stream
+from src.utils.graph_events import stream_graph_events
+from src.utils.graph_lifespan import graph_lifespan
+from src.utils.message_delta import merge_frames
+from src.utils.orjson_response import ORJSONResponse
+from src.utils.thread_config import thread_config
 
 
 # =========================
@@ -22,7 +35,9 @@ from src.app import graph   # <-- adjust import if needed
 app = FastAPI(
     title="CCC Chatbot API",
     version="1.0.0",
-    description="LangGraph-powered chatbot with memory, RAG, and streaming"
+    description="LangGraph-powered chatbot with memory, RAG, and streaming",
+    default_response_class=ORJSONResponse,
+    lifespan=graph_lifespan(workflow, graph),
 )
 
 # =========================
@@ -36,6 +51,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# =========================
+# Compression
+# =========================
+# Large JSON bodies only; Starlette skips text/event-stream, so SSE is untouched
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # =========================
 # Request / Response Models
 # =========================
@@ -63,40 +84,37 @@ class SuggestResponse(BaseModel):
 # =========================
 # Helpers
 # =========================
-def extract_final_answer(messages):
-    for msg in reversed(messages):
-        if isinstance(msg, AIMessage):
-            return msg
-    return None
-
-
-def extract_tool_metadata(messages):
-    for msg in reversed(messages):
-        if isinstance(msg, ToolMessage):
-            return {
-                "tool_name": msg.name,
-                "tool_type": "rag" if "retrieve" in msg.name.lower() else "custom"
-            }
-    return {"tool_name": None, "tool_type": "none"}
+def sse_event(event: str, data: Any) -> ServerSentEvent:
+    # Plain-text events (thread, node, tool, done) go out as-is; only
+    # structured payloads (message deltas) are JSON-encoded
+    if not isinstance(data, str):
+        data = orjson.dumps(data).decode()
+    return ServerSentEvent(event=event, data=data)
+
+
+def encode_frame(frame: dict) -> ServerSentEvent:
+    return sse_event(frame["event"], frame["data"])
+
+
+def is_droppable(frame: dict) -> bool:
+    # The client needs thread (thread id), answer text and done no matter how
+    # slow it reads; only node/tool progress updates may be dropped
+    return frame["event"] not in ("thread", "message", "done")
 
 
 # =========================
 # REST Endpoint
 # =========================
-@app.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest):
+@app.post("/chat", responses={200: {"model": ChatResponse}})
+async def chat(request: ChatRequest):
 
     # 🔹 Thread handling
     thread_id = request.thread_id or str(uuid.uuid4())
 
-    config = {
-        "configurable": {
-            "thread_id": thread_id
-        }
-    }
+    config = thread_config(thread_id)
 
     # 🔹 Run graph (invoke mode)
-    result = graph.invoke(
+    result = await app.state.graph.ainvoke(
         {
             "messages": [
                 HumanMessage(content=request.query)
@@ -106,68 +124,65 @@ def chat(request: ChatRequest):
         config=config
     )
 
-    messages = result["messages"]
-
-    # 🔹 Extract final answer
-    final_msg = extract_final_answer(messages)
-    tool_meta = extract_tool_metadata(messages)
+    # 🔹 Final answer + tool metadata (set by the answering node)
+    tool_name, tool_type = result.get("last_tool") or (None, "none")
 
-    return ChatResponse(
-        answer=final_msg.content if final_msg else "I don't know.",
-        thread_id=thread_id,
-        tool_type=tool_meta["tool_type"],
-        tool_name=tool_meta["tool_name"]
-    )
+    return ORJSONResponse({
+        "answer": result.get("final_answer") or "I don't know.",
+        "thread_id": thread_id,
+        "tool_type": tool_type,
+        "tool_name": tool_name,
+    })
 
 
 # =========================
 # Streaming Endpoint (SSE)
 # =========================
 @app.post("/chat/stream")
-def chat_stream(request: ChatRequest):
+async def chat_stream(request: ChatRequest):
 
     thread_id = request.thread_id or str(uuid.uuid4())
 
-    config = {
-        "configurable": {
-            "thread_id": thread_id
-        }
-    }
+    config = thread_config(thread_id)
 
-    def event_stream() -> Generator[str, None, None]:
-        yield f"event: thread\n"
-        yield f"data: {thread_id}\n\n"
+    async def event_stream() -> AsyncGenerator[dict, None]:
+        yield {"event": "thread", "data": thread_id}
 
-        for chunk in graph.stream(
+        async for ev in stream_graph_events(
+            app.state.graph,
             {
                 "messages": [
                     HumanMessage(content=request.query)
                 ],
                 "rewrite_count": 0,
             },
-            config=config
+            config,
+            ANSWER_NODES,
         ):
-            for node, update in chunk.items():
-
-                # 🔹 Node-level logs (CLI-style)
-                yield f"event: node\n"
-                yield f"data: 🔹 Node: {node}\n\n"
-
-                for msg in update["messages"]:
-                    if isinstance(msg, AIMessage):
-                        yield f"event: message\n"
-                        yield f"data: {msg.content}\n\n"
+            # 🔹 Node-level logs (CLI-style)
+            if ev["type"] == "node":
+                yield {"event": "node", "data": f"🔹 Node: {ev['node']}"}
+
+            # 🔹 Answer tokens
+            elif ev["type"] == "token":
+                yield {
+                    "event": "message",
+                    "data": {"id": ev["id"], "text": ev["text"]},
+                }
 
-                    elif isinstance(msg, ToolMessage):
-                        yield f"event: tool\n"
-                        yield f"data: Tool={msg.name}\n\n"
+            elif isinstance(ev["message"], ToolMessage):
+                yield {"event": "tool", "data": f"Tool={ev['message'].name}"}
 
-        yield "event: done\n"
-        yield "data: end\n\n"
+        yield {"event": "done", "data": "end"}
 
-    return StreamingResponse(
-        event_stream(),
-        media_type="text/event-stream"
+    return EventSourceResponse(
+        bounded_stream(
+            event_stream(),
+            encode=encode_frame,
+            merge=merge_frames,
+            droppable=is_droppable,
+        ),
+        ping=15,
     )
 
 SUGGESTION_PROMPT = """
@@ -186,14 +201,6 @@ Final Answer:
 {final_answer}
 """
 
-from langchain_core.messages import AIMessage
-
-def get_last_ai_answer(messages):
-    for msg in reversed(messages):
-        if isinstance(msg, AIMessage):
-            return msg.content
-    return None
-
 from langchain_deepseek import ChatDeepSeek
 import os
 response_model = ChatDeepSeek(
@@ -203,40 +210,20 @@ response_model = ChatDeepSeek(
     extra_body={"reasoning": {"enabled": True}},
 )
 
+# 🔹 Suggestions keyed by final answer (LRU), so repeated answers skip the LLM
+SUGGESTION_CACHE_SIZE = 512
+suggestion_cache: OrderedDict[str, list[str]] = OrderedDict()
 
-@app.post("/suggest", response_model=SuggestResponse)
-def suggest(request: SuggestRequest):
-
-    # 🔹 Decide source of final answer
-    final_answer = request.final_answer
-
-    if not final_answer:
-        if not request.thread_id:
-            return SuggestResponse(
-                suggestions=[],
-                thread_id=None
-            )
-
-        config = {
-            "configurable": {
-                "thread_id": request.thread_id
-            }
-        }
-
-        # Load memory from graph
-        state = graph.get_state(config)
-        final_answer = get_last_ai_answer(state["messages"])
 
-        if not final_answer:
-            return SuggestResponse(
-                suggestions=[],
-                thread_id=request.thread_id
-            )
+async def generate_suggestions(final_answer: str) -> list[str]:
+    cached = suggestion_cache.get(final_answer)
+    if cached is not None:
+        suggestion_cache.move_to_end(final_answer)
+        return cached
 
-    # 🔹 Generate suggestions
     prompt = SUGGESTION_PROMPT.format(final_answer=final_answer)
 
-    response = response_model.invoke(
+    response = await response_model.ainvoke(
         [{"role": "user", "content": prompt}]
     )
 
@@ -247,83 +234,136 @@ def suggest(request: SuggestRequest):
         if line.strip()
     ]
 
-    return SuggestResponse(
-        suggestions=suggestions,
-        thread_id=request.thread_id
-    )
+    suggestion_cache[final_answer] = suggestions
+    if len(suggestion_cache) > SUGGESTION_CACHE_SIZE:
+        suggestion_cache.popitem(last=False)
+
+    return suggestions
+
+
+@app.post("/suggest", responses={200: {"model": SuggestResponse}})
+async def suggest(request: SuggestRequest):
+
+    # 🔹 Decide source of final answer
+    final_answer = request.final_answer
+
+    if not final_answer:
+        if not request.thread_id:
+            return ORJSONResponse({
+                "suggestions": [],
+                "thread_id": None,
+            })
+
+        config = thread_config(request.thread_id)
+
+        # Load memory from graph
+        state = await app.state.graph.aget_state(config)
+        final_answer = state.values.get("final_answer")
+
+        if not final_answer:
+            return ORJSONResponse({
+                "suggestions": [],
+                "thread_id": request.thread_id,
+            })
+
+    # 🔹 Generate suggestions
+    suggestions = await generate_suggestions(final_answer)
+
+    return ORJSONResponse({
+        "suggestions": suggestions,
+        "thread_id": request.thread_id,
+    })
 
 
 # =========================
 # Health Check
 # =========================
-@app.get("/health")
-def health():
-    return {"status": "ok", "code": 200, "message": "CCC Chatbot API is healthy."}
-
-
-@app.get("/")
-def root():
-    return {
-        "welcome": "Welcome to the CCC Chatbot API",
-        "description": (
-            "This API powers the CCC Intelligent Chatbot built using LangGraph, "
-            "memory (checkpointer), RAG, web search, and custom tools. "
-            "It supports multi-turn conversations, query rewriting, tool routing, "
-            "context grading, and real-time streaming."
-        ),
+# Static bodies are serialized once at import, not on every probe
+HEALTH_BODY = orjson.dumps(
+    {"status": "ok", "code": 200, "message": "CCC Chatbot API is healthy."}
+)
 
-        "available_endpoints": {
-            "/docs": {
-                "method": "GET",
-                "purpose": "Interactive API documentation (Swagger UI)"
-            },
-            "/chat": {
-                "method": "POST",
-                "type": "REST",
-                "purpose": "Standard chatbot interaction (recommended for frontend)",
-                "body": {
-                    "query": "string (required)",
-                    "thread_id": "string (optional, used for memory)"
-                }
-            },
-            "/chat/stream": {
-                "method": "POST",
-                "type": "SSE (Streaming)",
-                "purpose": "Streams node-by-node execution and responses (debug/developer mode)"
-            },
-            "/suggest": {
-                "method": "POST",
-                "purpose": "Generates follow-up query suggestions based on the final answer",
-                "body": {
-                    "final_answer": "string (optional, if not provided, uses last AI answer from thread)",
-                    "thread_id": "string (optional, used to fetch last AI answer)"
-                }
-            },
-            "/health": {
-                "method": "GET",
-                "purpose": "Health check for monitoring and deployment"
+ROOT_BODY = orjson.dumps({
+    "welcome": "Welcome to the CCC Chatbot API",
+    "description": (
+        "This API powers the CCC Intelligent Chatbot built using LangGraph, "
+        "memory (checkpointer), RAG, web search, and custom tools. "
+        "It supports multi-turn conversations, query rewriting, tool routing, "
+        "context grading, and real-time streaming."
+    ),
+
+    "available_endpoints": {
+        "/docs": {
+            "method": "GET",
+            "purpose": "Interactive API documentation (Swagger UI)"
+        },
+        "/chat": {
+            "method": "POST",
+            "type": "REST",
+            "purpose": "Standard chatbot interaction (recommended for frontend)",
+            "body": {
+                "query": "string (required)",
+                "thread_id": "string (optional, used for memory)"
             }
         },
-
-        "chatbot_capabilities": [
-            "Multi-turn conversational memory",
-            "Automatic question rewriting for unclear queries",
-            "Context relevance grading before answering",
-            "Tool-aware reasoning (RAG, web, code, custom tools)",
-            "Fallback handling when information is unavailable",
-            "Streaming and non-streaming responses"
-        ],
-
-        "available_tools": {
-            "get_weather": "Fetches real-time weather information for a city",
-            "web_search": "Performs general web search for up-to-date information",
-            "tavily_search": "High-quality AI-optimized web search",
-            "code_executor": "Safely executes code snippets and returns output",
-            "retrieve_info_tool": "Retrieves general CCC society information",
-            "retrieve_domains_tool": "Fetches CCC technical domains and details",
-            "retrieve_events_tool": "Retrieves past and upcoming CCC events",
-            "retrieve_faqs_tool": "Answers frequently asked CCC-related questions",
-            "retrieve_members_tool": "Fetches CCC members and alumni information",
-            "retrieve_faculty_tool": "Retrieves faculty coordinators and mentors"
+        "/chat/stream": {
+            "method": "POST",
+            "type": "SSE (Streaming)",
+            "purpose": "Streams node-by-node execution and responses (debug/developer mode)"
         },
-    }
+        "/suggest": {
+            "method": "POST",
+            "purpose": "Generates follow-up query suggestions based on the final answer",
+            "body": {
+                "final_answer": "string (optional, if not provided, uses last AI answer from thread)",
+                "thread_id": "string (optional, used to fetch last AI answer)"
+            }
+        },
+        "/health": {
+            "method": "GET",
+            "purpose": "Health check for monitoring and deployment"
+        }
+    },
+
+    "chatbot_capabilities": [
+        "Multi-turn conversational memory",
+        "Automatic question rewriting for unclear queries",
+        "Context relevance grading before answering",
+        "Tool-aware reasoning (RAG, web, code, custom tools)",
+        "Fallback handling when information is unavailable",
+        "Streaming and non-streaming responses"
+    ],
+
+    "available_tools": {
+        "get_weather": "Fetches real-time weather information for a city",
+        "web_search": "Performs general web search for up-to-date information",
+        "tavily_search": "High-quality AI-optimized web search",
+        "code_executor": "Safely executes code snippets and returns output",
+        "retrieve_info_tool": "Retrieves general CCC society information",
+        "retrieve_domains_tool": "Fetches CCC technical domains and details",
+        "retrieve_events_tool": "Retrieves past and upcoming CCC events",
+        "retrieve_faqs_tool": "Answers frequently asked CCC-related questions",
+        "retrieve_members_tool": "Fetches CCC members and alumni information",
+        "retrieve_faculty_tool": "Retrieves faculty coordinators and mentors"
+    },
+})
+
+# Compressed once here too; a response that already has Content-Encoding is
+# passed through by GZipMiddleware instead of being compressed per request
+ROOT_BODY_GZIP = gzip.compress(ROOT_BODY, compresslevel=5)
+
+
+@app.get("/health")
+async def health():
+    return Response(HEALTH_BODY, media_type="application/json")
+
+
+@app.get("/")
+async def root(request: Request):
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            ROOT_BODY_GZIP,
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+    return Response(ROOT_BODY, media_type="application/json")
@@ -0,0 +1,78 @@
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Optional
+
+_DONE = object()
+
+
+async def bounded_stream(
+    source: AsyncIterator[Any],
+    encode: Callable[[Any], Any] = lambda frame: frame,
+    merge: Optional[Callable[[Any, Any], Any]] = None,
+    droppable: Callable[[Any], bool] = lambda frame: True,
+    maxsize: int = 64,
+) -> AsyncIterator[Any]:
+    """Relay frames from `source` through a bounded buffer.
+
+    The producer never waits on a slow client. When the buffer is full a new
+    frame is first folded via `merge` into the newest pending frame it can be
+    combined with (`merge` returns None when two frames cannot be combined),
+    looking back only past frames that may be dropped so the order of kept
+    frames never changes; failing that, the oldest pending frame for which
+    `droppable` is true is evicted. Frames that are not droppable (the opening
+    thread-id frame, text deltas, the terminal frame) are never lost: a run of
+    deltas for one message, with or without an id, collapses into one frame.
+    Frames are passed through `encode` only when the client is ready for them.
+    """
+    pending: deque = deque()
+    ready = asyncio.Event()
+    error: list[BaseException] = []
+
+    def put(frame) -> None:
+        if len(pending) >= maxsize and frame is not _DONE:
+            if merge and merge_into_pending(frame):
+                return
+            evict_oldest()
+        pending.append(frame)
+        ready.set()
+
+    def merge_into_pending(frame) -> bool:
+        for i in range(len(pending) - 1, -1, -1):
+            merged = merge(pending[i], frame)
+            if merged is not None:
+                pending[i] = merged
+                return True
+            if not droppable(pending[i]):
+                return False
+        return False
+
+    def evict_oldest() -> None:
+        for i, queued in enumerate(pending):
+            if droppable(queued):
+                del pending[i]
+                return
+
+    async def producer() -> None:
+        try:
+            async for frame in source:
+                put(frame)
+        except Exception as exc:
+            error.append(exc)
+        finally:
+            put(_DONE)
+
+    task = asyncio.create_task(producer())
+    try:
+        while True:
+            if not pending:
+                ready.clear()
+                await ready.wait()
+                continue
+            frame = pending.popleft()
+            if frame is _DONE:
+                break
+            yield encode(frame)
+        if error:
+            raise error[0]
+    finally:
+        task.cancel()
@@ -0,0 +1,52 @@
+from typing import Any, AsyncIterator, Container
+
+from langchain_core.messages import AIMessage
+
+from src.utils.message_delta import MessageDeltas
+
+
+async def stream_graph_events(
+    graph: Any,
+    inputs: dict,
+    config: dict,
+    answer_nodes: Container[str],
+) -> AsyncIterator[dict]:
+    """Flatten `graph.astream_events` into node, token and message events.
+
+    Yields dicts shaped as one of:
+        {"type": "node", "node": name}                     a graph node started
+        {"type": "token", "node": name, "id": ..., "text": ...}
+            new answer text streamed by a node in `answer_nodes`
+        {"type": "message", "node": name, "message": msg}  any other message a node returned
+    """
+    deltas = MessageDeltas()
+
+    async for ev in graph.astream_events(inputs, config=config, version="v2"):
+        kind = ev["event"]
+        node = ev.get("metadata", {}).get("langgraph_node")
+
+        if kind == "on_chat_model_stream":
+            if node not in answer_nodes:
+                continue
+            chunk = ev["data"]["chunk"]
+            text = deltas.add(chunk.id, chunk.text)
+            if text:
+                yield {"type": "token", "node": node, "id": chunk.id, "text": text}
+
+        # Node-level start/end events carry the node name as the run name
+        elif kind == "on_chain_start" and ev["name"] == node:
+            yield {"type": "node", "node": node}
+
+        elif kind == "on_chain_end" and ev["name"] == node:
+            output = ev["data"].get("output")
+            if not isinstance(output, dict):
+                continue
+
+            for msg in output.get("messages", []):
+                if isinstance(msg, AIMessage) and node in answer_nodes:
+                    # Anything the model did not stream token by token
+                    text = deltas.delta(msg.id, msg.text)
+                    if text:
+                        yield {"type": "token", "node": node, "id": msg.id, "text": text}
+                else:
+                    yield {"type": "message", "node": node, "message": msg}
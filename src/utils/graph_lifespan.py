@@ -0,0 +1,47 @@
+import os
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import FastAPI
+
+
+def graph_lifespan(workflow: Any, default_graph: Any):
+    """Build a FastAPI lifespan that puts the compiled graph on `app.state.graph`.
+
+    With POSTGRES_URI set, the graph is compiled once per process against an
+    AsyncPostgresSaver backed by a shared connection pool, so every worker
+    sees the same thread memory. Otherwise the in-process `default_graph`
+    (in-memory checkpointer) is used as-is.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        dsn = os.getenv("POSTGRES_URI")
+        if not dsn:
+            app.state.graph = default_graph
+            yield
+            return
+
+        # Optional dependencies, not part of requirements.txt
+        try:
+            from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+            from psycopg.rows import dict_row
+            from psycopg_pool import AsyncConnectionPool
+        except ImportError as exc:
+            raise RuntimeError(
+                "POSTGRES_URI is set but the Postgres checkpointer is not installed. "
+                'Install it with: pip install ".[postgres]"'
+            ) from exc
+
+        async with AsyncConnectionPool(
+            dsn,
+            max_size=int(os.getenv("POSTGRES_POOL_SIZE", "10")),
+            kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+            open=False,
+        ) as pool:
+            checkpointer = AsyncPostgresSaver(pool)
+            await checkpointer.setup()
+            app.state.graph = workflow.compile(checkpointer=checkpointer)
+            yield
+
+    return lifespan
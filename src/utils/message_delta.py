@@ -0,0 +1,47 @@
+from typing import Any, Optional
+
+
+class MessageDeltas:
+    """Remember how much of each message was already sent, keyed by message id."""
+
+    def __init__(self) -> None:
+        self._sent: dict[str, int] = {}
+
+    def delta(self, msg_id: Optional[str], content: Any) -> Any:
+        # Without an id (or with non-text content) there is nothing to diff against
+        if msg_id is None or not isinstance(content, str):
+            return content
+
+        prev_len = self._sent.get(msg_id, 0)
+        self._sent[msg_id] = len(content)
+        return content[prev_len:]
+
+    def add(self, msg_id: Optional[str], text: str) -> str:
+        """Record `text` as streamed for `msg_id` and return it unchanged."""
+        if msg_id is not None:
+            self._sent[msg_id] = self._sent.get(msg_id, 0) + len(text)
+        return text
+
+
+def merge_deltas(a: dict, b: dict) -> Optional[dict]:
+    """Fold two consecutive delta payloads of the same message into one.
+
+    Id-less deltas count as the same message as the id-less delta before them.
+    """
+    if (
+        a.get("event") == b.get("event")
+        and a.get("id") == b.get("id")
+        and isinstance(a.get("text"), str)
+        and isinstance(b.get("text"), str)
+    ):
+        return {**b, "text": a["text"] + b["text"]}
+    return None
+
+
+def merge_frames(a: dict, b: dict) -> Optional[dict]:
+    """`merge_deltas` for `{"event": ..., "data": ...}` frames of message events."""
+    if a["event"] == b["event"] == "message":
+        data = merge_deltas(a["data"], b["data"])
+        if data is not None:
+            return {"event": "message", "data": data}
+    return None
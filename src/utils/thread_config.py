@@ -0,0 +1,9 @@
+from functools import lru_cache
+
+from langchain_core.runnables import RunnableConfig
+
+
+@lru_cache(maxsize=4096)
+def thread_config(thread_id: str) -> RunnableConfig:
+    """Shared per-thread graph config; treat the returned dict as read-only."""
+    return {"configurable": {"thread_id": thread_id}}
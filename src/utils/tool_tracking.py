@@ -0,0 +1,36 @@
+from typing import Sequence
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langgraph.prebuilt import ToolNode
+
+
+def tool_type(tool_name: str) -> str:
+    """Classify a tool the way /chat has always reported it."""
+    return "rag" if "retrieve" in tool_name.lower() else "custom"
+
+
+def _with_last_tool(update: dict) -> dict:
+    tool_msgs = [m for m in update.get("messages", []) if isinstance(m, ToolMessage)]
+    if not tool_msgs:
+        return update
+    name = tool_msgs[-1].name
+    return {**update, "last_tool": (name, tool_type(name))}
+
+
+def tracking_tool_node(tools: Sequence) -> RunnableLambda:
+    """A ToolNode that also writes `last_tool` for every tool result it produces.
+
+    Recording it here rather than in the answering node keeps `last_tool`
+    current on every path, including a rewrite after which the model answers
+    without calling a tool again.
+    """
+    tool_node = ToolNode(tools)
+
+    def run(state: dict, config: RunnableConfig) -> dict:
+        return _with_last_tool(tool_node.invoke(state, config))
+
+    async def arun(state: dict, config: RunnableConfig) -> dict:
+        return _with_last_tool(await tool_node.ainvoke(state, config))
+
+    return RunnableLambda(run, afunc=arun)
@@ -0,0 +1,79 @@
+import asyncio
+
+from src.utils.bounded_stream import bounded_stream
+from src.utils.message_delta import merge_deltas
+
+
+def droppable(evt: dict) -> bool:
+    return evt["event"] not in ("init", "delta", "done")
+
+
+async def collect_slowly(source, maxsize: int = 8) -> list[dict]:
+    frames = []
+    async for frame in bounded_stream(
+        source, merge=merge_deltas, droppable=droppable, maxsize=maxsize
+    ):
+        frames.append(frame)
+        await asyncio.sleep(0.001)
+    return frames
+
+
+def test_slow_consumer_keeps_all_delta_text():
+    async def source():
+        yield {"event": "init", "thread_id": "t-1"}
+        for i in range(100):
+            yield {"event": "delta", "id": "m-1", "text": f"{i},"}
+            await asyncio.sleep(0)
+        yield {"event": "step", "step": 2, "node": "generate_answer"}
+        yield {"event": "done"}
+
+    frames = asyncio.run(collect_slowly(source()))
+
+    text = "".join(f["text"] for f in frames if f["event"] == "delta")
+    assert text == "".join(f"{i}," for i in range(100))
+    assert frames[0] == {"event": "init", "thread_id": "t-1"}
+    assert frames[-1] == {"event": "done"}
+
+
+def test_init_frame_survives_when_producer_runs_ahead():
+    async def source():
+        yield {"event": "init", "thread_id": "t-1"}
+        for i in range(50):
+            yield {"event": "step", "step": i, "node": "n"}
+        yield {"event": "done"}
+
+    async def run():
+        # The source never awaits, so it overruns the buffer before the first read
+        stream = bounded_stream(source(), droppable=droppable, maxsize=4)
+        return [frame async for frame in stream]
+
+    frames = asyncio.run(run())
+
+    assert frames[0]["event"] == "init"
+    assert frames[-1] == {"event": "done"}
+    assert len(frames) <= 4 + 2
+
+
+def test_idless_deltas_stay_bounded_and_in_order():
+    async def source():
+        yield {"event": "init", "thread_id": "t-1"}
+        for i in range(1000):
+            yield {"event": "delta", "id": None, "text": f"{i},"}
+        yield {"event": "delta", "id": "m-2", "text": "second"}
+        yield {"event": "delta", "id": None, "text": "third"}
+        yield {"event": "done"}
+
+    async def run():
+        # The source never awaits, so everything is buffered before the first read
+        stream = bounded_stream(
+            source(), merge=merge_deltas, droppable=droppable, maxsize=8
+        )
+        return [frame async for frame in stream]
+
+    frames = asyncio.run(run())
+
+    # Full buffer, plus the two later messages and done
+    assert len(frames) <= 8 + 3
+    assert [f.get("id") for f in frames if f["event"] == "delta"][-2:] == ["m-2", None]
+    text = "".join(f["text"] for f in frames if f["event"] == "delta")
+    assert text == "".join(f"{i}," for i in range(1000)) + "secondthird"
@@ -0,0 +1,95 @@
+import asyncio
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from src.utils.graph_events import stream_graph_events
+
+ANSWER_NODES = {"answer", "canned_answer"}
+
+
+def fake_model(*replies: str) -> GenericFakeChatModel:
+    return GenericFakeChatModel(messages=iter(AIMessage(r) for r in replies))
+
+
+def build_graph():
+    grader = fake_model("yes")
+    answerer = fake_model("Join via the recruitment form.")
+
+    def grade(state: MessagesState):
+        # Not an answer node: its model output must not leak as tokens
+        grader.invoke(state["messages"])
+        return {}
+
+    def tools(state: MessagesState):
+        return {"messages": [ToolMessage("faq text", name="retrieve_faqs_tool", tool_call_id="c-1")]}
+
+    def answer(state: MessagesState):
+        return {"messages": [answerer.invoke(state["messages"])]}
+
+    def canned_answer(state: MessagesState):
+        # Returns a message without streaming it
+        return {"messages": [AIMessage("See you there!", id="canned-1")]}
+
+    workflow = StateGraph(MessagesState)
+    for name, node in [
+        ("grade", grade),
+        ("tools", tools),
+        ("answer", answer),
+        ("canned_answer", canned_answer),
+    ]:
+        workflow.add_node(name, node)
+    workflow.add_edge(START, "grade")
+    workflow.add_edge("grade", "tools")
+    workflow.add_edge("tools", "answer")
+    workflow.add_edge("answer", "canned_answer")
+    workflow.add_edge("canned_answer", END)
+    return workflow.compile()
+
+
+def collect(graph) -> list[dict]:
+    async def run():
+        inputs = {"messages": [HumanMessage("How can I join CCC?")]}
+        return [ev async for ev in stream_graph_events(graph, inputs, {}, ANSWER_NODES)]
+
+    return asyncio.run(run())
+
+
+def test_node_events_in_order():
+    events = collect(build_graph())
+
+    nodes = [ev["node"] for ev in events if ev["type"] == "node"]
+    assert nodes == ["grade", "tools", "answer", "canned_answer"]
+
+
+def test_tokens_only_from_answer_nodes_without_duplicates():
+    events = collect(build_graph())
+
+    tokens = [ev for ev in events if ev["type"] == "token"]
+    assert {ev["node"] for ev in tokens} == {"answer", "canned_answer"}
+
+    streamed = [ev for ev in tokens if ev["node"] == "answer"]
+    assert len(streamed) > 1
+    assert len({ev["id"] for ev in streamed}) == 1
+    # The node's final message adds nothing the tokens did not already carry
+    assert "".join(ev["text"] for ev in streamed) == "Join via the recruitment form."
+
+
+def test_fallback_emits_unstreamed_answer_once():
+    events = collect(build_graph())
+
+    canned = [ev for ev in events if ev["type"] == "token" and ev["node"] == "canned_answer"]
+    assert canned == [
+        {"type": "token", "node": "canned_answer", "id": "canned-1", "text": "See you there!"}
+    ]
+
+
+def test_tool_messages_come_through_as_message_events():
+    events = collect(build_graph())
+
+    messages = [ev for ev in events if ev["type"] == "message"]
+    assert len(messages) == 1
+    assert messages[0]["node"] == "tools"
+    assert isinstance(messages[0]["message"], ToolMessage)
+    assert messages[0]["message"].name == "retrieve_faqs_tool"
@@ -0,0 +1,55 @@
+from src.utils.message_delta import MessageDeltas, merge_deltas, merge_frames
+
+
+def test_delta_returns_unsent_suffix_per_message():
+    deltas = MessageDeltas()
+
+    assert deltas.delta("m-1", "Hel") == "Hel"
+    assert deltas.delta("m-1", "Hello") == "lo"
+    assert deltas.delta("m-2", "Hi") == "Hi"
+    assert deltas.delta("m-1", "Hello") == ""
+
+
+def test_delta_without_id_or_text_is_passed_through():
+    deltas = MessageDeltas()
+
+    assert deltas.delta(None, "Hello") == "Hello"
+    assert deltas.delta(None, "Hello") == "Hello"
+    blocks = [{"type": "text", "text": "Hi"}]
+    assert deltas.delta("m-1", blocks) is blocks
+
+
+def test_add_counts_streamed_text_towards_delta():
+    deltas = MessageDeltas()
+
+    assert deltas.add("m-1", "Hel") == "Hel"
+    assert deltas.add("m-1", "lo") == "lo"
+    assert deltas.add(None, "ignored") == "ignored"
+    assert deltas.delta("m-1", "Hello!") == "!"
+
+
+def test_merge_deltas_joins_text_of_the_same_message():
+    a = {"event": "delta", "step": 1, "id": "m-1", "text": "Hel"}
+    b = {"event": "delta", "step": 2, "id": "m-1", "text": "lo"}
+
+    assert merge_deltas(a, b) == {"event": "delta", "step": 2, "id": "m-1", "text": "Hello"}
+    assert merge_deltas(a, {**b, "id": "m-2"}) is None
+    assert merge_deltas({"event": "step", "step": 1}, b) is None
+
+
+def test_merge_deltas_joins_consecutive_idless_deltas():
+    a = {"event": "delta", "id": None, "text": "Hel"}
+    b = {"event": "delta", "id": None, "text": "lo"}
+
+    assert merge_deltas(a, b) == {"event": "delta", "id": None, "text": "Hello"}
+    assert merge_deltas(a, {**b, "id": "m-1"}) is None
+
+
+def test_merge_frames_only_merges_message_events():
+    a = {"event": "message", "data": {"id": "m-1", "text": "Hel"}}
+    b = {"event": "message", "data": {"id": "m-1", "text": "lo"}}
+
+    assert merge_frames(a, b) == {"event": "message", "data": {"id": "m-1", "text": "Hello"}}
+    assert merge_frames(a, {"event": "message", "data": {"id": "m-2", "text": "lo"}}) is None
+    assert merge_frames({"event": "node", "data": "🔹 Node: a"}, b) is None
+    assert merge_frames({"event": "node", "data": "x"}, {"event": "node", "data": "y"}) is None
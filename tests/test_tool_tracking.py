@@ -0,0 +1,64 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+from langgraph.graph import END, START, MessagesState, StateGraph
+from langgraph.prebuilt import tools_condition
+
+from src.utils.tool_tracking import tool_type, tracking_tool_node
+
+
+@tool
+def retrieve_faqs_tool(query: str) -> str:
+    """Answer CCC FAQs."""
+    return "no relevant FAQ"
+
+
+class State(MessagesState):
+    final_answer: str | None
+    last_tool: tuple[str, str] | None
+
+
+def build_rewrite_graph():
+    """generate_query_or_respond -> all_tools -> rewrite_question -> answer directly."""
+
+    def generate_query_or_respond(state: State):
+        if any(isinstance(m, ToolMessage) for m in state["messages"]):
+            answer = AIMessage("I don't know.")
+            return {"messages": [answer], "final_answer": answer.content}
+        call = {"name": "retrieve_faqs_tool", "args": {"query": "join"}, "id": "call-1"}
+        return {"messages": [AIMessage("", tool_calls=[call])]}
+
+    def rewrite_question(state: State):
+        return {"messages": [HumanMessage("How do I join CCC?")]}
+
+    workflow = StateGraph(State)
+    workflow.add_node("generate_query_or_respond", generate_query_or_respond)
+    workflow.add_node("all_tools", tracking_tool_node([retrieve_faqs_tool]))
+    workflow.add_node("rewrite_question", rewrite_question)
+    workflow.add_edge(START, "generate_query_or_respond")
+    workflow.add_conditional_edges(
+        "generate_query_or_respond",
+        tools_condition,
+        {"tools": "all_tools", END: END},
+    )
+    # grade_documents judged the context irrelevant
+    workflow.add_edge("all_tools", "rewrite_question")
+    workflow.add_edge("rewrite_question", "generate_query_or_respond")
+    return workflow.compile()
+
+
+def test_last_tool_survives_rewrite_then_direct_answer():
+    graph = build_rewrite_graph()
+    inputs = {"messages": [HumanMessage("join?")]}
+
+    result = asyncio.run(graph.ainvoke(inputs))
+
+    assert result["final_answer"] == "I don't know."
+    assert result["last_tool"] == ("retrieve_faqs_tool", "rag")
+    assert graph.invoke(inputs)["last_tool"] == ("retrieve_faqs_tool", "rag")
+
+
+def test_tool_type():
+    assert tool_type("retrieve_events_tool") == "rag"
+    assert tool_type("web_search") == "custom"